@@ -1,9 +1,9 @@
 #!/usr/bin/env python3
 
 try:
-    from setuptools import setup
+    from setuptools import setup, Extension
 except ImportError:
-    from distutils.core import setup
+    from distutils.core import setup, Extension
 
 setup(
     name='python-yr',
@@ -16,6 +16,10 @@ setup(
     maintainer_email='hugo.shamrock@gmail.com',
     url='https://github.com/wckd/python-yr',
     packages=['yr'],
+    ext_modules=[
+        # optional speedup for yr.utils.is_one_hour_apart, the pure python version is used if this fails to build
+        Extension('yr._filter', sources=['yr/_filter.c'], optional=True),
+    ],
     classifiers=[  # https://pypi.python.org/pypi?%3Aaction=list_classifiers
         'Programming Language :: Python :: 3',
         'Programming Language :: Python',
@@ -31,4 +35,5 @@ setup(
         ],
     },
     install_requires=['xmltodict'],  # $$solve$$ ~> /usr/lib/python3.4/distutils/dist.py:260: UserWarning: Unknown distribution option: 'install_requires' warnings.warn(msg)
+    extras_require={'numpy': ['numpy']},  # Yr.forecast_times_as_arrays()
 )
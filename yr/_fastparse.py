@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+'''
+Bulk parsing of the fixed-width ISO 8601 timestamps used by api.met.no (i.e. "2022-01-05T18:00:00Z").
+All timestamps are parsed at once with numpy, so no datetime object is created per forecast.
+Note: requires numpy, which is optional for the rest of the library.
+'''
+import numpy as np
+
+ISO_ZULU_LENGTH = len('2022-01-05T18:00:00Z')
+_SEPARATOR_COLUMNS = [4, 7, 10, 13, 16, 19]
+_SEPARATORS = np.frombuffer(b'--T::Z', dtype=np.uint8)
+_DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int16)
+_DIGIT_COLUMNS = [column for column in range(ISO_ZULU_LENGTH) if column not in _SEPARATOR_COLUMNS]
+
+def _digits(chars, start, stop):
+    '''
+    Returns the number in columns [start, stop) of the (n, ISO_ZULU_LENGTH) array of ascii digits
+    '''
+    number = np.zeros(chars.shape[0], dtype=np.int16)
+    for column in range(start, stop):
+        number = number*10 + chars[:, column]
+    return number
+
+def _days_in_month(year, month):
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    return _DAYS_IN_MONTH[month - 1] + ((month == 2) & leap)
+
+def parse_iso_zulu_array(timestamps):
+    '''
+    Parses a sequence of "YYYY-MM-DDTHH:MM:SSZ" strings
+    :return tuple: (year, month, day, hour, minute, second) as numpy int16 arrays
+
+    :raises ValueError: if a timestamp is not on the form YYYY-MM-DDTHH:MM:SSZ, or is not a valid date and time
+    '''
+    lengths = np.fromiter(map(len, timestamps), dtype=np.intp, count=len(timestamps))
+    if np.any(lengths != ISO_ZULU_LENGTH):
+        raise ValueError('Expected %d character timestamps, i.e. 2022-01-05T18:00:00Z' % ISO_ZULU_LENGTH)
+    data = ''.join(timestamps).encode('ascii')
+    chars = np.frombuffer(data, dtype=np.uint8).reshape(-1, ISO_ZULU_LENGTH)
+    separators = chars[:, _SEPARATOR_COLUMNS]
+    digits = chars[:, _DIGIT_COLUMNS]
+    if np.any(separators != _SEPARATORS) or np.any((digits < ord('0')) | (digits > ord('9'))):
+        raise ValueError('Expected timestamps on the form YYYY-MM-DDTHH:MM:SSZ')
+    chars = chars.astype(np.int16) - ord('0')
+    year, month, day = _digits(chars, 0, 4), _digits(chars, 5, 7), _digits(chars, 8, 10)
+    hour, minute, second = _digits(chars, 11, 13), _digits(chars, 14, 16), _digits(chars, 17, 19)
+    if (np.any((year < 1) | (month < 1) | (month > 12) | (day < 1)) or
+            np.any(day > _days_in_month(year, np.clip(month, 1, 12))) or
+            np.any((hour > 23) | (minute > 59) | (second > 59))):
+        raise ValueError('Timestamp out of range')
+    return year, month, day, hour, minute, second
+
+def parse_iso_zulu_datetime64(timestamps):
+    '''
+    Same as parse_iso_zulu_array, but combines the fields into a single numpy datetime64[s] array (UTC)
+    '''
+    year, month, day, hour, minute, second = parse_iso_zulu_array(timestamps)
+    date = (year - 1970).astype('datetime64[Y]').astype('datetime64[M]') + (month - 1).astype('timedelta64[M]')
+    date = date.astype('datetime64[D]') + (day - 1).astype('timedelta64[D]')
+    return date + hour.astype('timedelta64[h]') + minute.astype('timedelta64[m]') + second.astype('timedelta64[s]')
@@ -0,0 +1,129 @@
+/*
+ * Optional C speedup for yr.utils.is_one_hour_apart, see setup.py.
+ * Compares two fixed-width ISO 8601 timestamps ("2022-01-05T18:00:00Z")
+ * without creating any datetime objects.
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <string.h>
+
+#define ISO_ZULU_LENGTH 20
+
+static int
+is_digit(char c)
+{
+    return c >= '0' && c <= '9';
+}
+
+/* 1 if s is on the form YYYY-MM-DDTHH:MM:SSZ */
+static int
+is_iso_zulu(const char *s, Py_ssize_t length)
+{
+    static const char pattern[] = "dddd-dd-ddTdd:dd:ddZ";
+    Py_ssize_t i;
+    if (length != ISO_ZULU_LENGTH)
+        return 0;
+    for (i = 0; i < ISO_ZULU_LENGTH; i++) {
+        if (pattern[i] == 'd' ? !is_digit(s[i]) : s[i] != pattern[i])
+            return 0;
+    }
+    return 1;
+}
+
+static int
+number(const char *s, int digits)
+{
+    int n = 0;
+    while (digits--)
+        n = n*10 + (*s++ - '0');
+    return n;
+}
+
+static int
+days_in_month(int year, int month)
+{
+    static const int days[] = {31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31};
+    if (month == 2 && year % 4 == 0 && (year % 100 != 0 || year % 400 == 0))
+        return 29;
+    return days[month - 1];
+}
+
+/* 1 if the fields of s are a valid date and time, s must already be is_iso_zulu */
+static int
+is_valid_datetime(const char *s)
+{
+    int year = number(s, 4), month = number(s + 5, 2), day = number(s + 8, 2);
+    if (year < 1 || month < 1 || month > 12 || day < 1 || day > days_in_month(year, month))
+        return 0;
+    return number(s + 11, 2) <= 23 && number(s + 14, 2) <= 59 && number(s + 17, 2) <= 59;
+}
+
+/* 1 if the date of b is the day after the date of a, both must already be is_valid_datetime */
+static int
+is_next_day(const char *a, const char *b)
+{
+    int year = number(a, 4), month = number(a + 5, 2), day = number(a + 8, 2);
+    if (day < days_in_month(year, month)) {
+        day++;
+    }
+    else if (month < 12) {
+        day = 1;
+        month++;
+    }
+    else {
+        day = 1;
+        month = 1;
+        year++;
+    }
+    return number(b, 4) == year && number(b + 5, 2) == month && number(b + 8, 2) == day;
+}
+
+static PyObject *
+is_next_hour(PyObject *self, PyObject *args)
+{
+    const char *a, *b;
+    Py_ssize_t a_length, b_length;
+    int hour_a, hour_b;
+
+    if (!PyArg_ParseTuple(args, "s#s#:is_next_hour", &a, &a_length, &b, &b_length))
+        return NULL;
+    if (!is_iso_zulu(a, a_length) || !is_iso_zulu(b, b_length)) {
+        PyErr_SetString(PyExc_ValueError, "Expected timestamps on the form YYYY-MM-DDTHH:MM:SSZ");
+        return NULL;
+    }
+    if (!is_valid_datetime(a) || !is_valid_datetime(b)) {
+        PyErr_SetString(PyExc_ValueError, "Timestamp out of range");
+        return NULL;
+    }
+
+    if (memcmp(a + 13, b + 13, ISO_ZULU_LENGTH - 13) != 0)  /* minutes and seconds */
+        Py_RETURN_FALSE;
+    hour_a = number(a + 11, 2);
+    hour_b = number(b + 11, 2);
+    if (memcmp(a, b, 10) == 0)  /* same day */
+        return PyBool_FromLong(hour_b - hour_a == 1);
+    if (hour_a == 23 && hour_b == 0)
+        return PyBool_FromLong(is_next_day(a, b));
+    Py_RETURN_FALSE;
+}
+
+static PyMethodDef filter_methods[] = {
+    {"is_next_hour", is_next_hour, METH_VARARGS,
+     "is_next_hour(time_from, time_to)\n--\n\n"
+     "Return True if the YYYY-MM-DDTHH:MM:SSZ timestamp time_to is exactly one hour after time_from."},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef filter_module = {
+    PyModuleDef_HEAD_INIT,
+    "yr._filter",
+    "Optional C speedup for yr.utils.is_one_hour_apart",
+    -1,
+    filter_methods
+};
+
+PyMODINIT_FUNC
+PyInit__filter(void)
+{
+    return PyModule_Create(&filter_module);
+}
@@ -1,18 +1,20 @@
 #!/usr/bin/env python3
-import datetime
-import json
 from yr.libyr import Yr
+from yr.utils import is_one_hour_apart
 
 weather = Yr(location_name='Norway/Rogaland/Stavanger/Stavanger')
 
-hour = datetime.timedelta(hours=1)
+def json_timestamp(forecast_json, key):
+    # '"@from": "2022-01-05T18:00:00Z"' -> '2022-01-05T18:00:00Z', no need to json.loads() the whole forecast
+    prefix = '"{}": "'.format(key)
+    start = forecast_json.find(prefix)
+    if start == -1:
+        raise KeyError(key)
+    start += len(prefix)
+    return forecast_json[start:forecast_json.find('"', start)]
+
 for forecast_json in weather.forecast(as_json=True):
     # FIXME: not very user-friendly, add this filtering to the yr library?
-    forecast = json.loads(forecast_json)
-    time_from = datetime.datetime.strptime(forecast['@from'], '%Y-%m-%dT%H:%M:%SZ')
-    time_to   = datetime.datetime.strptime(forecast['@to'], '%Y-%m-%dT%H:%M:%SZ')
-    delta = time_to - time_from
-    
-    if delta == hour: # hour_by_hour only
+    if is_one_hour_apart(json_timestamp(forecast_json, '@from'), json_timestamp(forecast_json, '@to')): # hour_by_hour only
         print(forecast_json)
 
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+'''
+Compares the optional C extension yr._filter.is_next_hour with the pure python path of yr.utils.is_one_hour_apart,
+build it first and run from the repository root with:
+    python3 setup.py build_ext --inplace && python3 -m yr.internal.check_filter
+'''
+import sys
+import itertools
+import yr.utils as utils
+
+def outcome(function, time_from, time_to):
+    try:
+        return function(time_from, time_to)
+    except (ValueError, TypeError) as e: # TypeError: mixing naive and aware timestamps in the fallback
+        return type(e)
+
+def python_path(time_from, time_to):
+    is_next_hour, utils.is_next_hour = utils.is_next_hour, None
+    try:
+        return utils.is_one_hour_apart(time_from, time_to)
+    finally:
+        utils.is_next_hour = is_next_hour
+
+if utils.is_next_hour is None:
+    sys.exit('yr._filter is not built')
+
+# every hour around month, year and leap day boundaries, plus invalid months/days/hours
+dates = ['2022-01-05', '2022-01-31', '2022-02-01', '2022-02-28', '2022-03-01', '2022-12-31', '2023-01-01',
+         '2024-02-28', '2024-02-29', '2024-03-01', '1900-02-28', '1900-03-01', '2000-02-29', '2000-03-01',
+         '2022-00-05', '2022-13-05', '2022-13-06', '2022-01-00', '2022-01-32', '2023-02-29', '2022-04-31']
+times = ['{:02d}:00:00'.format(hour) for hour in range(25)] + ['18:30:00', '19:00:59', '18:60:00']
+timestamps = ['{}T{}Z'.format(date, time) for date in dates for time in times]
+# wrong format, 20 characters ending with Z and otherwise
+timestamps += ['2022-01-05 18:00:00Z', '2022-0a-05T18:00:00Z', '2022-01-05T18:00:0٢Z', '2022-01-05T18:00:0ØZ',
+               '2022-01-05T18:00:00', '2022-01-05T19:00:00', '2022-01-05T19:00:00+00:00']
+
+checked = 0
+for time_from, time_to in itertools.product(timestamps, repeat=2):
+    c = outcome(utils.is_one_hour_apart, time_from, time_to)
+    python = outcome(python_path, time_from, time_to)
+    assert c == python, (time_from, time_to, c, python)
+    checked += 1
+
+print('OK, {} pairs'.format(checked))
@@ -48,6 +48,31 @@ class Yr:
         for time in times:
             yield self.py2result(time, as_json)
 
+    def forecast_times_as_arrays(self):
+        """
+        Returns the @from and @to of all forecasts as two parallel numpy datetime64[s] arrays (UTC),
+        i.e. hour by hour forecasts are where (time_to - time_from) == numpy.timedelta64(1, 'h').
+        Note: requires numpy
+        """
+        try:
+            from yr._fastparse import parse_iso_zulu_datetime64
+        except ImportError:
+            # allow calling without install
+            from _fastparse import parse_iso_zulu_datetime64
+
+        times = self.dictionary['weatherdata']['product']['time']
+        time_from = parse_iso_zulu_datetime64([time['@from'] for time in times])
+        time_to = parse_iso_zulu_datetime64([time['@to'] for time in times])
+        return time_from, time_to
+
+    @property
+    def xml_source(self):
+        return self.xml_data.decode(self.connect.encoding)
+
+    @xml_source.setter
+    def xml_source(self, xml_source):
+        self.xml_data = xml_source.encode(self.connect.encoding)
+
     def now(self, as_json=False):
         return next(self.forecast(as_json))
 
@@ -100,8 +125,8 @@ class Yr:
             raise YrException('location_name or location_xyz parameter must be set')
 
         self.connect = Connect(location=self.location)
-        self.xml_source = self.connect.read()
-        self.dictionary = self.xml2dict(self.xml_source)
+        self.xml_data = self.connect.read()  # bytes
+        self.dictionary = self.xml2dict(self.xml_data)
         self.credit = self.language.dictionary['credit']
 
 if __name__ == '__main__':
@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
 import os
-import io
 import re
 import csv
 import time
 import shelve
+import shutil
 import functools
 import zipfile
 import tempfile  # Cache
@@ -15,6 +15,9 @@ log = logging.getLogger(__name__)
 directory = tempfile.gettempdir()
 shelve_filename = os.path.join(directory, 'yr_location_to_coordinates.shelve')
 
+_MEM_CACHE = dict() # in-process cache in front of the shelve, see shelve_cache
+_LATLON_RE = re.compile(r'lat=([\d.]+)&lon=([\d.]+)&altitude=([\d.]+)')
+
 class APIError(Exception):
     pass
 
@@ -58,15 +61,19 @@ def get_zip_cached(url, cache_filename, old_age_days=30): # assume the zip files
     if response.status != 200:
         raise APIError("Invalid responce from %s, expected status 200, got %s" % (url, response.status))
 
+    # download to a temporary file first, so that a failed download never leaves a truncated zip as cache_filename
+    tmp_filename = cache_filename + '.tmp'
     try:
-        with open(cache_filename, 'wb') as f:
-            f.write(response.read())
+        with open(tmp_filename, 'wb') as f:
+            shutil.copyfileobj(response, f, length=1 << 20) # stream 1 MiB at a time
+        os.replace(tmp_filename, cache_filename)
     except Exception as e:
         log.error('Zip download failed, clearing cache')
         try:
-            os.remove(cache_filename)
+            os.remove(tmp_filename)
         except:
             pass
+        raise APIError("Failed to download %s: %s" % (url, e)) from e
 
     return cache_filename
 
@@ -78,18 +85,36 @@ def parse_location_csv(f, location_name):
     where location_name is expected to be found in column 0 and the returned value is in column 1. See
     https://developer.yr.no/doc/guides/getting-started-from-forecast-xml/
     '''
-    encoder = io.TextIOWrapper(f)
-    csvreader = csv.reader(encoder, delimiter='\t')
-    lat_lon_str = None
-    for row in csvreader:
-        if row[0] == location_name:
-            lat_lon_str = row[1] 
-            break # returns first match
-    else: # for loop failed
+    # lowercase the whole file once, location_name is expected to be lowercase already (see parse_zip_cached)
+    data = b'\n' + f.read() # leading newline so that the first row also matches the needle
+    if location_name.isascii():
+        data = data.lower() # bytes.lower() only lowercases ascii, which is enough to match an ascii location_name
+    else:
+        data = data.decode('utf-8').lower().encode('utf-8')
+
+    # csv.reader would accept the name both as is and quoted, search for both and use the first row found
+    start = -1
+    for name in (location_name, '"' + location_name.replace('"', '""') + '"'):
+        found = data.find(b'\n' + name.encode('utf-8') + b'\t')
+        if found != -1 and (start == -1 or found < start):
+            start = found
+    if start == -1:
         return None
+    # else
+    end = data.find(b'\n', start + 1)
+    if end == -1:
+        end = len(data)
+    row = next(csv.reader([data[start + 1:end].decode('utf-8')], delimiter='\t')) # only parse the matching row
+    return parse_lat_lon(row[1])
+
+def parse_lat_lon(lat_lon_str):
+    '''
+    Parses column 1 of the location csv file, i.e. "lat=50.08804&lon=14.42076&altitude=202"
+    :return dict: dictionary with {'lat': ..., 'lon': ..., 'altitude': ...}
 
-    pattern = 'lat=([\d.]+)&lon=([\d.]+)&altitude=([\d.]+)'
-    reg = re.match(pattern, lat_lon_str)
+    :raises APIError: if lat_lon_str is not on the expected form
+    '''
+    reg = _LATLON_RE.match(lat_lon_str)
     result = None
     if reg:
         result = dict()
@@ -97,33 +122,58 @@ def parse_location_csv(f, location_name):
         result['lon'] = float(reg.group(2))
         result['altitude'] = float(reg.group(3))
     else:
-        raise APIError('Expected lat/lon/altitude string matching %s, got %s' % (pattern, lat_lon_str))
+        raise APIError('Expected lat/lon/altitude string matching %s, got %s' % (_LATLON_RE.pattern, lat_lon_str))
 
     return result
 
+@functools.lru_cache(maxsize=8)
+def _zip_members(zip_filename, mtime):
+    '''
+    Indexes the members of zip_filename by lowercase country, i.e. {'czech_republic': ['.../Czech_Republic.csv']}.
+    mtime is only part of the cache key, so that a re-downloaded zip file is indexed again.
+    '''
+    members = dict()
+    with zipfile.ZipFile(zip_filename, 'r') as z:
+        for name in z.namelist():
+            basename = name.split('/')[-1]
+            if basename.endswith('.csv'):
+                country = basename[:-len('.csv')].lower()
+                members.setdefault(country, list()).append(name)
+    return members
+
 def shelve_cache(func):
     '''
     Wrapper for persistent storage of return value using python shelves module.
+    Values are also kept in memory, so repeated calls within a process never touch the shelve.
     Note: never expires, grows forever. 
     Assumption is that the user probably only wants weather for a 
     few different location names and that the yr database never updates the lat/lon for a given location.
     '''
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        cache_key = repr(args) + repr(kwargs) # yes, this will change if the parameter order changes, but who cares.
+        cache_key = (args, tuple(sorted(kwargs.items()))) # hashable, used as is for the memory cache
+
+        # already seen by this process?
+        if cache_key in _MEM_CACHE:
+            log.debug('Returning memory cache %s', cache_key)
+            return _MEM_CACHE[cache_key]
 
         # is it cached?
+        shelve_key = str(cache_key) # shelve keys must be strings
         with shelve.open(shelve_filename) as f:
-            if cache_key in f:
-                log.debug('Returning shelve cache %s from %s', cache_key, shelve_filename)
-                return f[cache_key]
+            if shelve_key in f:
+                log.debug('Returning shelve cache %s from %s', shelve_key, shelve_filename)
+                ret = f[shelve_key]
+                _MEM_CACHE[cache_key] = ret
+                return ret
         
         # guess not, call function
         ret = func(*args, **kwargs)
 
         # save for next time
         with shelve.open(shelve_filename) as f:
-            f[cache_key] = ret
+            f[shelve_key] = ret
+        _MEM_CACHE[cache_key] = ret
 
         return ret
 
@@ -152,18 +202,16 @@ def parse_zip_cached(url, cache_filename, location_name):
 
     search_for = country + '.csv'
     results = list()
-    with zipfile.ZipFile(zip_filename, 'r') as z:
-        # find country csv filename(s)
-        matches = list() 
-        for name in z.namelist():
-            if name.endswith(search_for):
-               matches.append(name)
+    mtime = os.path.getmtime(zip_filename)
+    # find country csv filename(s)
+    matches = _zip_members(zip_filename, mtime).get(country, list())
 
-        log.info('searching %s', matches)               
-        if len(matches) == 0:
-            raise APIError("Unable to find %s in %s" % (search_for, zip_filename))
-        
-        # find correct row in csv file(s)
+    log.info('searching %s', matches)               
+    if len(matches) == 0:
+        raise APIError("Unable to find %s in %s" % (search_for, zip_filename))
+
+    # find correct row in csv file(s)
+    with zipfile.ZipFile(zip_filename, 'r') as z:
         for name in matches: # hopefully only 1 file, but lets allow multiple
             with z.open(name, 'r') as f:
                 res = parse_location_csv(f, location_name)
@@ -1,14 +1,20 @@
 #!/usr/bin/env python3
 
 import logging
+import re  # is_one_hour_apart
+import calendar  # is_one_hour_apart
 import os.path
-import json  # Language
+import json  # Language, Cache
+import functools  # Language
 import tempfile  # Cache
 import datetime  # Cache
 import urllib.request  # Connect
+import urllib.error  # Connect
+import email.utils  # Connect, Cache
+import time  # Connect
 import urllib.parse  # Location
-import xmltodict
-from xml.parsers.expat import ExpatError
+import io  # Cache
+from xml.etree import ElementTree  # Cache
 
 log = logging.getLogger(__name__)
 
@@ -17,8 +23,48 @@ try:
 except ImportError:
     # allow calling without install
     import location_to_coordinates
+
+try:
+    from yr._filter import is_next_hour  # optional C extension, see setup.py
+except ImportError:
+    is_next_hour = None
     
 
+_ISO_ZULU_RE = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}Z')
+
+
+def _check_iso_zulu(timestamp):
+    '''
+    Raises ValueError unless timestamp is a valid "YYYY-MM-DDTHH:MM:SSZ" date and time, the same checks as yr._filter.
+    '''
+    if not _ISO_ZULU_RE.fullmatch(timestamp):
+        raise ValueError('Expected timestamps on the form YYYY-MM-DDTHH:MM:SSZ')
+    year, month, day = int(timestamp[0:4]), int(timestamp[5:7]), int(timestamp[8:10])
+    if (year < 1 or not 1 <= month <= 12 or not 1 <= day <= calendar.monthrange(year, month)[1] or
+            int(timestamp[11:13]) > 23 or int(timestamp[14:16]) > 59 or int(timestamp[17:19]) > 59):
+        raise ValueError('Timestamp out of range')
+
+
+def is_one_hour_apart(time_from, time_to):
+    '''
+    Returns True if the ISO 8601 timestamps time_from and time_to (i.e. "2022-01-05T18:00:00Z") are exactly one hour apart.
+    Timestamps on the same day are compared by slicing the fixed-width strings, so no datetime objects are created,
+    only a day rollover (or an unexpected format) falls back to parsing.
+    Uses the optional C extension yr._filter when it is built, both raise ValueError for invalid timestamps.
+    '''
+    if len(time_from) == len(time_to) == 20 and time_from.endswith('Z') and time_to.endswith('Z'):
+        if is_next_hour is not None:
+            return is_next_hour(time_from, time_to)
+        _check_iso_zulu(time_from)
+        _check_iso_zulu(time_to)
+        if time_from[:10] == time_to[:10]:
+            return time_from[13:] == time_to[13:] and int(time_to[11:13]) - int(time_from[11:13]) == 1
+    # else
+    delta = (datetime.datetime.fromisoformat(time_to.replace('Z', '+00:00')) -
+             datetime.datetime.fromisoformat(time_from.replace('Z', '+00:00')))
+    return delta == datetime.timedelta(hours=1)
+
+
 class YrObject:
 
     script_directory = os.path.dirname(os.path.abspath(__file__))  # directory of the script
@@ -52,13 +98,19 @@ class Language(YrObject):
 
     def get_dictionary(self):
         try:
-            log.info('read language dictionary: {}'.format(self.filename))
-            with open(self.filename, mode='r', encoding=self.encoding) as f:
-                return json.load(f)
+            return _load_lang(self.filename, self.encoding)
         except Exception as e:
             raise YrException(e)
 
 
+@functools.lru_cache(maxsize=None)
+def _load_lang(filename, encoding):
+    """Read and parse a language dictionary, once per process (the returned dict is shared, do not modify)"""
+    log.info('read language dictionary: {}'.format(filename))
+    with open(filename, mode='r', encoding=encoding) as f:
+        return json.load(f)
+
+
 
 class API_Locationforecast(YrObject):
 
@@ -154,13 +206,32 @@ class Connect(YrObject):
             cache = Cache(self.location)
             if not cache.exists() or not cache.is_fresh():
                 log.info('read online: {}'.format(self.location.url))
-                agent = {"User-Agent" : "Python yr.no client"}
-                request = urllib.request.Request(self.location.url, headers=agent)
-                response = urllib.request.urlopen(request)
+                headers = {"User-Agent" : "Python yr.no client"}
+                validators = cache.load_validators() if cache.exists() else dict()
+                # conditional request, only download again if changed
+                if 'ETag' in validators:
+                    headers['If-None-Match'] = validators['ETag']
+                if 'Last-Modified' in validators:
+                    headers['If-Modified-Since'] = validators['Last-Modified']
+                request = urllib.request.Request(self.location.url, headers=headers)
+                try:
+                    response = urllib.request.urlopen(request)
+                except urllib.error.HTTPError as e:
+                    if e.code != 304:
+                        raise
+                    # @nextrun in the cachefile has passed, but the data is unchanged:
+                    # keep the cachefile and consider it fresh until the new Expires (see Cache.is_fresh)
+                    log.info('not modified: {}'.format(self.location.url))
+                    validators.update(cache.get_validators(e.headers))
+                    if 'Expires' not in validators or cache.expires_timestamp(validators) <= datetime.datetime.now():
+                        validators['Expires'] = email.utils.formatdate(time.time() + cache.timeout*60, usegmt=True)
+                    cache.dump_validators(validators)
+                    return cache.load()
                 if response.status != 200:
                     raise
-                weatherdata = response.read().decode(self.encoding)
+                weatherdata = response.read()  # bytes, the xml parsers do their own decoding
                 cache.dump(weatherdata)
+                cache.dump_validators(cache.get_validators(response.headers))
             else:
                 weatherdata = cache.load()
             return weatherdata
@@ -173,6 +244,7 @@ class Cache(YrObject):
     directory = tempfile.gettempdir()
     extension = 'xml'
     timeout = 15  # cache timeout in minutes
+    _valid_until = dict()  # {filename: (mtime, valid_until)}, shared by all instances as Connect.read creates a new Cache per call
 
     def __init__(self, location):
         self.location = location
@@ -183,56 +255,114 @@ class Cache(YrObject):
                 extension=self.extension,
             ),  # basename of filename
         )
+        self.validators_filename = self.filename + '.meta.json'  # Last-Modified/ETag of the cachefile
 
     def dump(self, data):
         log.info('writing cachefile: {}'.format(self.filename))
-        with open(self.filename, mode='w', encoding=self.encoding) as f:
+        with open(self.filename, mode='wb') as f:
             f.write(data)
 
+    @staticmethod
+    def get_validators(headers):
+        return {key: headers[key] for key in ('Last-Modified', 'ETag', 'Expires') if headers.get(key)}
+
+    def dump_validators(self, validators):
+        with open(self.validators_filename, mode='w', encoding=self.encoding) as f:
+            json.dump(validators, f)
+
+    def load_validators(self):
+        try:
+            with open(self.validators_filename, mode='r', encoding=self.encoding) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return dict()
+
+    def expires_timestamp(self, validators=None):
+        """Return the Expires header of the cachefile as local time, or the epoch if it is unknown"""
+        validators = self.load_validators() if validators is None else validators
+        try:
+            expires = email.utils.parsedate_to_datetime(validators['Expires'])
+        except (KeyError, TypeError, ValueError):
+            return datetime.datetime.fromtimestamp(0)
+        if expires.tzinfo is None:
+            expires = expires.replace(tzinfo=datetime.timezone.utc)
+        return expires.astimezone(tz=None).replace(tzinfo=None)
+
     def valid_until_timestamp_from_file(self):
-        xmldata = self.load()
-        d = None
+        mtime = os.stat(self.filename).st_mtime
+        memo = self._valid_until.get(self.filename)
+        if memo is not None and memo[0] == mtime:
+            return memo[1]
+        valid_until = self._valid_until_timestamp_from_meta(self._load_meta())
+        self._valid_until[self.filename] = (mtime, valid_until)
+        return valid_until
+
+    def _load_meta(self):
+        """Return the <meta> element of the cachefile, or None if it is missing or the file can not be parsed"""
         try:
-            d = xmltodict.parse(xmldata)
-        except ExpatError:
+            # <meta> is near the top of the file, so usually the head is enough
+            meta = self._find_meta(self.load_head())
+        except ElementTree.ParseError:
+            meta = None
+        if meta is None:
+            log.info('<meta> not found in head of cachefile, reading all of it')
+            try:
+                meta = self._find_meta(self.load())
+            except ElementTree.ParseError:
+                return None
+        return meta
+
+    @staticmethod
+    def _find_meta(xmldata):
+        # only <meta> is needed, stop parsing as soon as it is complete instead of building the whole tree
+        for event, element in ElementTree.iterparse(io.BytesIO(xmldata)):
+            if element.tag == 'meta':
+                return element
+        return None
+
+    def _valid_until_timestamp_from_meta(self, meta):
+        if meta is None:
             return datetime.datetime.fromtimestamp(0)
-        meta = d['weatherdata']['meta']
         if isinstance(self.location, API_Locationforecast):
-            if isinstance(meta['model'], dict):
-                next_update = meta['model']['@nextrun']
-            elif isinstance(meta['model'], list):
-                next_update = meta['model'][0]['@nextrun']
-            else:
+            model = meta.find('model')  # first model if there are several
+            if model is None:
                 return False
-            next_update = next_update.replace("Z", " +0000")
-            date_format = "%Y-%m-%dT%H:%M:%S %z"
-            # Read the UTC timestamp, convert to local time and remove the timezone information.
-            valid_until = datetime.datetime.strptime(next_update,date_format)
+            next_update = model.get('nextrun')
+            # Read the UTC timestamp (YYYY-MM-DDTHH:MM:SSZ), convert to local time and remove the timezone information.
+            valid_until = datetime.datetime.fromisoformat(next_update.rstrip("Z"))
             valid_until = valid_until.replace(tzinfo=datetime.timezone.utc).astimezone(tz=None).replace(tzinfo=None)
         else:
-            next_update = meta['nextupdate']
-            date_format = '%Y-%m-%dT%H:%M:%S'
-            valid_until = datetime.datetime.strptime(next_update, date_format)
+            next_update = meta.findtext('nextupdate')
+            valid_until = datetime.datetime.fromisoformat(next_update)
         # hotfix API_Locationforecast ++ @nextrun <<<
         log.info('Cache is valid until {}'.format(valid_until))
         return valid_until
 
     def is_fresh(self):
         log.info('Now is {}'.format(datetime.datetime.now()))
-        return datetime.datetime.now() <= self.valid_until_timestamp_from_file()
+        now = datetime.datetime.now()
+        # the Expires header is extended by Connect.read when the server answers 304 Not Modified
+        return now <= self.valid_until_timestamp_from_file() or now <= self.expires_timestamp()
 
     def exists(self):
         return os.path.isfile(self.filename)
 
+    def load_head(self, n=4096):
+        """Return (at most) the first n bytes of the cachefile"""
+        with open(self.filename, mode='rb') as f:
+            return f.read(n)
+
     def load(self):
         log.info('read from cachefile: {}'.format(self.filename))
-        with open(self.filename, mode='r', encoding=self.encoding) as f:
+        with open(self.filename, mode='rb') as f:
             return f.read()
 
     def remove(self):
         if os.path.isfile(self.filename):
             os.remove(self.filename)
             log.info('removed cachefile: {}'.format(self.filename))
+        if os.path.isfile(self.validators_filename):
+            os.remove(self.validators_filename)
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.DEBUG)